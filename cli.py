@@ -24,6 +24,7 @@ def main(argv=None):
     p.add_argument("--regex", action="store_true")
     p.add_argument("--separators", action="store_true")
     p.add_argument("--config", default=None)
+    p.add_argument("-j", "--jobs", type=int, default=None)
 
     args = p.parse_args(argv)
 
@@ -38,4 +39,5 @@ def main(argv=None):
         args.output,
         rules,
         include_separators=args.separators,
+        jobs=args.jobs,
     )
\ No newline at end of file
@@ -1,39 +1,893 @@
 from __future__ import annotations
 
+import functools
+import io
+import mmap
+import multiprocessing
+import os
 import re
+import stat
+import sys
 import threading
-from typing import Callable, TextIO
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, BinaryIO, Callable, Iterator
 
 try:
+    import re._parser as _sre_parse  # 3.11+
+except ImportError:
+    import sre_parse as _sre_parse
+
+try:
+    from .core_fast import decide, decide_ranges
+    from .core_hs import build_database as _build_hs_database
+    from .core_hs import line_matcher as _hs_line_matcher
     from .rules import Rules
 except ImportError:
+    from core_fast import decide, decide_ranges
+    from core_hs import build_database as _build_hs_database
+    from core_hs import line_matcher as _hs_line_matcher
     from rules import Rules
 
+try:
+    from .core_ext import MAX_BLOCKS as _EXT_MAX_BLOCKS  # optional: see core_ext.pyx
+    from .core_ext import extract_block
+except ImportError:
+    try:
+        from core_ext import MAX_BLOCKS as _EXT_MAX_BLOCKS
+        from core_ext import extract_block
+    except ImportError:
+        extract_block = None
+
+try:
+    import ahocorasick  # optional: pip install pyahocorasick
+except ImportError:
+    ahocorasick = None
+
 
 ProgressCb = Callable[[int, bool], None]
 
+# Input is read in large binary blocks and split into lines in C
+_READ_BLOCK = 1 << 20
+
+# Block-wide bytes.find (one C pass per pattern) beats a single automaton
+# pass until there are about this many literal patterns
+_AC_MIN_PATTERNS = 12
+
+# Regex mode only prefilters on required literals at least this long;
+# shorter ones hit too many lines to be worth the extra pass
+_PREFILTER_MIN_LEN = 3
+
+# Kept lines are gathered in a bytearray and written once it reaches this size
+_WRITE_BLOCK = 1 << 20
+
+# Files at least this big are split into shards of about _SHARD_SIZE bytes
+# and extracted on several processes (extract_file's `jobs`)
+_PARALLEL_MIN_SIZE = 128 << 20
+_SHARD_SIZE = 32 << 20
+
+_SEPARATOR = b"\n----- BLOCK TRIGGER @ line %d (matched %d rule(s)) -----\n"
+
+# A line end as text mode's universal newlines saw it
+_EOL_RE = re.compile(rb"\r\n?|\n")
+
 # Strip leading bracketed blocks like [2026.02.17-13.05.15:784][120] at start of line
 _LEADING_BRACKETED_RE = re.compile(r"^(?:\[[^\]]*\]\s*)+")
 
+# Patterns that change meaning once joined into one alternation, so those
+# stay separate: back-references and conditionals (group numbers shift) and
+# a leading global flag like (?i), which Python < 3.11 applies to every
+# branch. Deliberately conservative: a false positive only costs the fast path.
+_STANDALONE_RE = re.compile(r"\\(?:[1-9]|g<)|\(\?P=|\(\?\(|^\(\?[aiLmsux]+\)")
+
 
-def _strip_timestamp_line(line: str) -> str:
+def _strip_timestamp_line(line: bytes) -> bytes:
     """Remove timestamp/prefix so output starts at 'LogTemp:' or after leading brackets."""
-    if "LogTemp:" in line:
-        return line[line.index("LogTemp:") :]
-    rest = _LEADING_BRACKETED_RE.sub("", line.rstrip("\r\n")).lstrip()
-    return rest + "\n"
+    idx = line.find(b"LogTemp:")
+    if idx >= 0:
+        return line[idx:]
+    # Whitespace is Unicode's (U+0085, U+00A0, \x1c...), as on the text lines
+    # this used to get; undecodable bytes round-trip unchanged
+    text = line.rstrip(b"\r\n").decode("utf-8", "surrogateescape")
+    rest = _LEADING_BRACKETED_RE.sub("", text).lstrip()
+    return rest.encode("utf-8", "surrogateescape") + b"\n"
+
+
+def _iter_read_blocks(fin: BinaryIO) -> Iterator[bytes]:
+    # One reusable buffer for readinto(); only whole-line blocks are copied out
+    buf = bytearray(_READ_BLOCK)
+    view = memoryview(buf)
+    # The unfinished line so far, one piece per read: joined once its "\n"
+    # arrives, so a line spanning many reads isn't copied again on each one
+    pending: list[bytes] = []
+    while n := fin.readinto(buf):
+        nl = buf.rfind(b"\n", 0, n)
+        if nl < 0:
+            pending.append(bytes(view[:n]))
+            continue
+        pending.append(view[: nl + 1])
+        yield b"".join(pending)
+        pending = [bytes(view[nl + 1 : n])] if nl + 1 < n else []
+    if pending:
+        yield b"".join(pending)
+
+
+def _iter_mmap_blocks(
+    mm: mmap.mmap, pos: int = 0, size: int | None = None
+) -> Iterator[bytes]:
+    # Windows end just after a newline, so no line (or "\r\n") is cut in two.
+    # `size` can fall just after a lone "\r" (a shard head's end), so the
+    # search for a "\n" stops there.
+    if size is None:
+        size = len(mm)
+    while pos < size:
+        end = pos + _READ_BLOCK
+        if end < size:
+            nl = mm.rfind(b"\n", pos, end)
+            if nl < 0:
+                nl = mm.find(b"\n", end, size)
+            end = size if nl < 0 else nl + 1
+        else:
+            end = size
+        yield mm[pos:end]
+        pos = end
+
+
+def _advise_sequential(fd: int) -> bool:
+    """Tell the kernel `fd` is read front to back.
+
+    Returns True when the file is bigger than half the RAM: it can't stay
+    cached between runs anyway, so pages are better dropped once read than
+    left to evict everything else.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        size = os.fstat(fd).st_size
+        ram = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return False
+    return size > ram // 2
+
+
+def _drop_behind(raw: Iterator[bytes], fd: int) -> Iterator[bytes]:
+    # A block is done with once the consumer asks for the next one
+    pos = 0
+    for buf in raw:
+        yield buf
+        os.posix_fadvise(fd, pos, len(buf), os.POSIX_FADV_DONTNEED)
+        pos += len(buf)
+
+
+def _iter_blocks(fin: BinaryIO) -> Iterator[bytes]:
+    """Yield newline-aligned blocks of the binary file `fin`.
+
+    Every block ends with "\n" except possibly the last (an unterminated
+    last line). "\r\n" and a lone "\r" are folded to "\n" first, like text
+    mode's universal newlines did.
+
+    Regular files are memory-mapped and walked in windows (with a
+    sequential-access hint); anything mmap refuses, such as empty files or
+    pipes, is read in blocks instead. So are files too big to stay cached,
+    whose pages are dropped as they are consumed (mapped pages can't be).
+    """
+    fd = fin.fileno()
+    drop = _advise_sequential(fd)
+    mm = None
+    if not drop:
+        try:
+            mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            pass
+    try:
+        if mm is None:
+            raw = _iter_read_blocks(fin)
+            if drop:
+                raw = _drop_behind(raw, fd)
+        else:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            raw = _iter_mmap_blocks(mm)
+        yield from _fold_newlines(raw)
+    finally:
+        if mm is not None:
+            mm.close()
+
+
+def _fold_newlines(raw: Iterator[bytes]) -> Iterator[bytes]:
+    # Blocks are cut after a "\n", so no "\r\n" is split between two
+    for buf in raw:
+        if b"\r" in buf:
+            buf = buf.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        yield buf
+
+
+def _iter_line_blocks(blocks: Iterator[bytes]) -> Iterator[tuple[bytes, list[bytes]]]:
+    """Split blocks into (buf, lines). Lines keep their "\n", as text mode
+    returned them, so rules see (and kept lines are written as) exactly that."""
+    for buf in blocks:
+        yield buf, io.BytesIO(buf).readlines()
 
 
 def _compile_patterns(patterns: list[str], regex: bool):
+    # Literals are matched against line bytes, regexes against decoded text
     if not regex:
-        return patterns, None
+        return [p.encode("utf-8") for p in patterns], None
     return None, [re.compile(p) for p in patterns]
 
 
-def _matches(line: str, literals, regexes) -> bool:
-    if literals is not None:
-        return any(p in line for p in literals)
-    return any(r.search(line) is not None for r in (regexes or []))
+def _build_automaton(includes: list[str], triggers: list[str], inc_bit: int):
+    """Build one Aho-Corasick automaton over includes and triggers.
+
+    Each key maps to its hit-mask bits (inc_bit for an include, 1 << i for
+    trigger i), OR-ed together when a pattern is used more than once, so a
+    line's mask is the OR over all matches. Keys are UTF-8 bytes viewed as
+    latin-1 so the (str-only) automaton can scan raw bytes decoded the same
+    way. Returns None when pyahocorasick isn't installed or a pattern is
+    empty (an empty literal matches every line; the plain path handles that).
+    Patterns with a newline before their last character can never match
+    within one line and are left out, since the automaton runs over whole
+    blocks.
+    """
+    if ahocorasick is None or not (includes or triggers):
+        return None
+    if any(not p for p in includes) or any(not t for t in triggers):
+        return None
+
+    bits: dict[str, int] = {}
+    for p in includes:
+        bits[p] = bits.get(p, 0) | inc_bit
+    for i, t in enumerate(triggers):
+        bits[t] = bits.get(t, 0) | (1 << i)
+    bits = {k: v for k, v in bits.items() if "\n" not in k[:-1]}
+    if not bits:
+        return None
+
+    ac = ahocorasick.Automaton()
+    for key, mask in bits.items():
+        ac.add_word(key.encode("utf-8").decode("latin-1"), mask)
+    ac.make_automaton()
+    return ac
+
+
+def _union_regex(patterns: list[str], named: bool = False):
+    """Join patterns into one alternation so a line needs a single search.
+
+    With named=True each pattern i is wrapped as ``(?P<_t{i}>...)`` so the
+    match's ``lastgroup`` says which one hit. Returns the bound ``search``,
+    or None if the patterns can't be joined safely.
+
+    Plain ``re`` is used on purpose: re2's per-call overhead made it ~3x
+    slower than ``re`` on typical short log lines.
+    """
+    if not patterns or any(_STANDALONE_RE.search(p) for p in patterns):
+        return None
+    if named:
+        joined = "|".join(f"(?P<_t{i}>{p})" for i, p in enumerate(patterns))
+    else:
+        joined = "(?:" + ")|(?:".join(patterns) + ")"
+    try:
+        return re.compile(joined).search
+    except re.error:
+        return None
+
+
+def _required_literal(pattern: str) -> str | None:
+    """Return a literal that every match of `pattern` contains, or None.
+
+    Only the top level of the parsed pattern is looked at (its longest run of
+    plain characters), so alternations, case-insensitive patterns and
+    anything the parser rejects give None.
+    """
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except Exception:
+        return None
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    best = run = ""
+    for op, arg in parsed:
+        if op == _sre_parse.LITERAL:
+            run += chr(arg)
+            if len(run) > len(best):
+                best = run
+        else:
+            run = ""
+    # U+FFFD can come from undecodable bytes, so its UTF-8 needn't be present
+    if len(best) < _PREFILTER_MIN_LEN or "\ufffd" in best:
+        return None
+    return best
+
+
+def _prefilter_literals(patterns: list[str]) -> tuple[tuple[bytes, int], ...] | None:
+    # Only usable when no pattern can match without its literal
+    literals = [_required_literal(p) for p in patterns]
+    if not literals or not all(literals):
+        return None
+    return tuple(dict.fromkeys((lit.encode("utf-8") for lit in literals), 1).items())
+
+
+@dataclass(frozen=True)
+class CompiledRules:
+    include_literals: list[bytes] | None
+    include_regexes: list[re.Pattern] | None
+    trig_literals: list[bytes] | None
+    trig_regexes: list[re.Pattern] | None
+    after_by_idx: tuple[int, ...]
+    # Each line is reduced to a hit mask: bit i for trigger i, plus inc_bit
+    # when any include matched. core_fast.decide turns masks into emit flags.
+    inc_bit: int
+    # Literal mode: (pattern, mask bits) searched block-wide with bytes.find,
+    # or one automaton run over the whole block. Each distinct pattern
+    # appears once, carrying every bit it stands for.
+    literal_bits: tuple[tuple[bytes, int], ...] | None = None
+    ac: Any = None
+    # Regex mode: one Hyperscan scan per line covers includes and triggers
+    # (hs_bits maps match ids to mask bits); without it, includes and
+    # triggers each share a single alternation (inc_search, trig_search).
+    hs_db: Any = None
+    hs_bits: list[int] | None = None
+    inc_search: Callable | None = None
+    trig_search: Callable | None = None
+    # Regex mode: when every pattern has a required literal (mask bits
+    # unused), only lines containing one of them are scanned at all
+    prefilter: tuple[tuple[bytes, int], ...] | None = None
+
+
+@functools.lru_cache(maxsize=32)
+def _compiled_for(
+    rules_key: tuple[tuple[str, ...], tuple[tuple[str, int], ...], bool],
+) -> CompiledRules:
+    """Compile everything extract_file needs for one rule set.
+
+    Cached so repeated runs with the same rules (e.g. GUI re-runs) skip
+    building regexes, automata and Hyperscan databases.
+    """
+    include, blocks, regex = rules_key
+    include = list(include)
+    triggers = [t for t, _ in blocks]
+    inc_bit = 1 << len(blocks)
+
+    include_literals, include_regexes = _compile_patterns(include, regex)
+    trig_literals, trig_regexes = _compile_patterns(triggers, regex)
+    c = CompiledRules(
+        include_literals=include_literals,
+        include_regexes=include_regexes,
+        trig_literals=trig_literals,
+        trig_regexes=trig_regexes,
+        after_by_idx=tuple(n for _, n in blocks),
+        inc_bit=inc_bit,
+    )
+    if not regex:
+        # A literal used as both include and trigger (or by two rules) is
+        # searched once. A line's only "\n" is its last byte, so literals
+        # with one anywhere else never match.
+        bits_by_pat: dict[bytes, int] = {}
+        pairs = [(p, inc_bit) for p in include_literals]
+        pairs += [(t, 1 << i) for i, t in enumerate(trig_literals)]
+        for p, bit in pairs:
+            if b"\n" not in p[:-1]:
+                bits_by_pat[p] = bits_by_pat.get(p, 0) | bit
+        ac = None
+        if len(bits_by_pat) >= _AC_MIN_PATTERNS:
+            ac = _build_automaton(include, triggers, inc_bit)
+        return replace(c, literal_bits=tuple(bits_by_pat.items()), ac=ac)
+
+    # The `re` alternations are built even with Hyperscan: _make_scanner
+    # still needs them for an unterminated last line
+    c = replace(
+        c,
+        prefilter=_prefilter_literals(include + triggers),
+        inc_search=_union_regex(include),
+        trig_search=_union_regex(triggers, named=True),
+    )
+    hs_db = _build_hs_database(include + triggers)
+    if hs_db is not None:
+        hs_bits = [inc_bit] * len(include) + [1 << i for i in range(len(triggers))]
+        return replace(c, hs_db=hs_db, hs_bits=hs_bits)
+    return c
+
+
+def _make_scanner(c: CompiledRules) -> Callable[[list[bytes]], list[int]]:
+    """Pick the regex-mode loop that turns one block of lines into hit masks.
+
+    Chosen once per run from the engine and the rule shape, so each variant
+    only does the work it needs (no trigger loop without block rules, no
+    include test without includes).
+    """
+    inc_bit = c.inc_bit
+
+    # Plain Python `re` on decoded text
+    inc_regexes = c.include_regexes or []
+    inc_searches = tuple(r.search for r in inc_regexes)
+    if c.inc_search is not None:
+        inc_any = c.inc_search  # one alternation over all includes
+    elif len(inc_searches) == 1:
+        inc_any = inc_searches[0]
+    elif len(inc_searches) == 2:
+        s0, s1 = inc_searches
+
+        def inc_any(s):
+            return s0(s) or s1(s)
+
+    else:
+        # No per-line generator: a plain loop over pre-bound searches
+        def inc_any(s, _searches=inc_searches) -> bool:
+            for search in _searches:
+                if search(s):
+                    return True
+            return False
+
+    trig_searches = [(r.search, 1 << i) for i, r in enumerate(c.trig_regexes)]
+    trig_search = c.trig_search
+    group_bits = {f"_t{i}": 1 << i for i in range(len(trig_searches))}
+
+    def trig_hits(s) -> int:
+        if trig_search is not None:
+            found = trig_search(s)
+            if found is None:
+                return 0
+            # Other triggers may match elsewhere on the line too; only
+            # trigger lines pay for checking them one by one.
+            m = group_bits[found.lastgroup]
+        else:
+            m = 0
+        for search, bit in trig_searches:
+            if not m & bit and search(s):
+                m |= bit
+        return m
+
+    def subjects(lines: list[bytes]) -> list[str]:
+        return [line.decode("utf-8", errors="replace") for line in lines]
+
+    if not c.after_by_idx:
+
+        def scan_re(lines: list[bytes]) -> list[int]:
+            return [inc_bit if inc_any(s) else 0 for s in subjects(lines)]
+
+    elif not inc_regexes:
+
+        def scan_re(lines: list[bytes]) -> list[int]:
+            return [trig_hits(s) for s in subjects(lines)]
+
+    else:
+
+        def scan_re(lines: list[bytes]) -> list[int]:
+            return [
+                (inc_bit if inc_any(s) else 0) | trig_hits(s) for s in subjects(lines)
+            ]
+
+    if c.hs_db is None:
+        return scan_re
+
+    # Owns Hyperscan scratch space, which concurrent scans can't share, so
+    # it is made per run like the scanner itself
+    hs_match, hs_bits = _hs_line_matcher(c.hs_db), c.hs_bits
+
+    def scan_hs(lines: list[bytes]) -> list[int]:
+        masks = []
+        for line in lines:
+            if not line.endswith(b"\n"):
+                masks += scan_re([line])
+                continue
+            # The line as `re` sees it, "\n" included, with the same U+FFFD
+            # replacements `re`'s text has if it isn't ASCII
+            if not line.isascii():
+                line = line.decode("utf-8", errors="replace").encode("utf-8")
+            m = 0
+            for i in hs_match(line):
+                m |= hs_bits[i]
+            masks.append(m)
+        return masks
+
+    return scan_hs
+
+
+def _run_lines(
+    blocks: Iterator[bytes],
+    c: CompiledRules,
+    out: bytearray,
+    rules: Rules,
+    include_separators: bool,
+    *,
+    active: list[int] | None = None,
+    line_no: int = 0,
+) -> Iterator[int]:
+    """Regex mode: match line by line, appending kept lines to `out`.
+
+    Yields the running line count after each block. `active` (countdowns,
+    updated in place) and `line_no` let a run continue where another left off.
+    """
+    after_by_idx = c.after_by_idx
+    inc_bit = c.inc_bit
+    trig_mask = inc_bit - 1
+    strip = rules.strip_timestamps
+    if active is None:
+        active = [0] * len(after_by_idx)
+
+    scan = _make_scanner(c)
+
+    prefilter = c.prefilter
+    for buf, lines in _iter_line_blocks(blocks):
+        first_no = line_no + 1
+        line_no += len(lines)
+
+        if prefilter is None:
+            masks = scan(lines)
+        else:
+            # Lines with none of the required literals can't match anything
+            hit = [idx for idx, _, _ in _literal_events(buf, prefilter, None)]
+            masks = [0] * len(lines)
+            for idx, m in zip(hit, scan([lines[idx] for idx in hit])):
+                masks[idx] = m
+        # Without block rules the include bit alone decides
+        keep = decide(masks, inc_bit, after_by_idx, active) if after_by_idx else masks
+
+        for no, line, m, k in zip(range(first_no, line_no + 1), lines, masks, keep):
+            if not k:
+                continue
+            if include_separators and m & trig_mask:
+                out += _SEPARATOR % (no, bin(m & trig_mask).count("1"))
+            out += _strip_timestamp_line(line) if strip else line
+        yield line_no
+
+
+def _literal_events(
+    buf: bytes, literal_bits: tuple[tuple[bytes, int], ...], ac
+) -> list[tuple[int, int, int]]:
+    """Return (line_idx, mask, line_start) for every line of `buf` that hits.
+
+    The whole block is searched at once (bytes.find per pattern, or the
+    automaton `ac` over the block), so lines that hit nothing cost no Python
+    work at all.
+    """
+    hits: dict[int, int] = {}  # line start offset -> mask
+    find, rfind = buf.find, buf.rfind
+    if ac is not None:
+        for end, bits in ac.iter(buf.decode("latin-1")):
+            start = rfind(b"\n", 0, end) + 1
+            hits[start] = hits.get(start, 0) | bits
+    else:
+        n = len(buf)
+        for pat, bit in literal_bits:
+            i = find(pat)
+            # `i < n` stops an empty pattern matching past the final newline
+            while 0 <= i < n:
+                start = rfind(b"\n", 0, i) + 1
+                hits[start] = hits.get(start, 0) | bit
+                # One hit per line is enough; resume on the next line
+                nl = find(b"\n", i)
+                if nl < 0:
+                    break
+                i = find(pat, nl + 1)
+
+    events = []
+    idx = 0
+    prev = 0
+    for start in sorted(hits):
+        idx += buf.count(b"\n", prev, start)
+        prev = start
+        events.append((idx, hits[start], start))
+    return events
+
+
+def _append_span(out: bytearray, buf: bytes, start: int, end: int, strip: bool):
+    if not strip:
+        out += memoryview(buf)[start:end]
+        return
+    lines = buf[start:end].split(b"\n")
+    last = lines.pop()
+    for line in lines:
+        out += _strip_timestamp_line(line + b"\n")
+    if last:
+        out += _strip_timestamp_line(last)
+
+
+def _run_sparse(
+    blocks: Iterator[bytes],
+    c: CompiledRules,
+    out: bytearray,
+    rules: Rules,
+    include_separators: bool,
+    *,
+    active: list[int] | None = None,
+    line_no: int = 0,
+) -> Iterator[int]:
+    """Literal mode: find hits block-wide and copy kept line ranges to `out`.
+
+    Only lines that hit (and the lines emitted after triggers) are ever
+    looked at individually. Same contract as _run_lines otherwise.
+    """
+    after_by_idx = c.after_by_idx
+    inc_bit = c.inc_bit
+    trig_mask = inc_bit - 1
+    if active is None:
+        active = [0] * len(after_by_idx)
+    strip = rules.strip_timestamps
+
+    if extract_block is not None and not strip and len(after_by_idx) <= _EXT_MAX_BLOCKS:
+        # The whole per-block loop in C, one pass over the block
+        for buf in blocks:
+            line_no += extract_block(
+                buf,
+                c.literal_bits,
+                inc_bit,
+                after_by_idx,
+                active,
+                out,
+                include_separators,
+                _SEPARATOR,
+                line_no,
+            )
+            yield line_no
+        return
+
+    for buf in blocks:
+        n = len(buf)
+        n_lines = buf.count(b"\n") + (not buf.endswith(b"\n"))
+        events = _literal_events(buf, c.literal_bits, c.ac)
+        ranges = decide_ranges(events, n_lines, inc_bit, after_by_idx, active)
+
+        # Byte offsets of range bounds: jump to the nearest hit line, then
+        # walk forward line by line (only ever across emitted lines).
+        find = buf.find
+        ev = 0
+        cur_idx = cur_off = 0
+
+        def offset_of(target: int) -> int:
+            nonlocal ev, cur_idx, cur_off
+            while ev < len(events) and events[ev][0] <= target:
+                if events[ev][0] > cur_idx:
+                    cur_idx, cur_off = events[ev][0], events[ev][2]
+                ev += 1
+            while cur_idx < target:
+                nl = find(b"\n", cur_off)
+                cur_off = n if nl < 0 else nl + 1
+                cur_idx += 1
+            return cur_off
+
+        sep = 0  # next event that may need a separator
+        for first, last in ranges:
+            start = offset_of(first)
+            if include_separators:
+                while sep < len(events) and events[sep][0] < last:
+                    idx, m, line_start = events[sep]
+                    sep += 1
+                    if idx < first or not m & trig_mask:
+                        continue
+                    _append_span(out, buf, start, line_start, strip)
+                    n_hit = bin(m & trig_mask).count("1")
+                    out += _SEPARATOR % (line_no + idx + 1, n_hit)
+                    start = line_start
+            _append_span(out, buf, start, offset_of(last), strip)
+
+        line_no += n_lines
+        yield line_no
+
+
+def _rules_key(rules: Rules):
+    # BlockRule is a NamedTuple, so rules.blocks already is (trigger, after) pairs
+    return (rules.include, rules.blocks, rules.regex)
+
+
+def _settle_point(
+    mm: mmap.mmap, start: int, end: int, c: CompiledRules
+) -> tuple[int, int]:
+    """Return (offset, lines) for the end of a shard's head: the line by which
+    max(after) lines without a trigger have passed.
+
+    Any countdown carried into the shard has run out by then (only lines
+    without a trigger tick), so from there on the shard extracts the same
+    whatever came before it.
+    """
+    need = max(c.after_by_idx, default=0)
+    if not need:
+        return start, 0
+    if c.trig_regexes is not None:
+        searches = [r.search for r in c.trig_regexes]
+
+        def is_trigger(line: bytes) -> bool:
+            s = line.decode("utf-8", errors="replace")
+            return any(search(s) for search in searches)
+
+    else:
+        trig_mask = c.inc_bit - 1
+        pats = [p for p, bit in c.literal_bits if bit & trig_mask]
+
+        def is_trigger(line: bytes) -> bool:
+            return any(p in line for p in pats)
+
+    base, n_lines = start, 0
+    for buf in _iter_mmap_blocks(mm, start, end):
+        # Raw bytes, so offsets stay file offsets; line ends are folded by hand
+        i = 0
+        while i < len(buf):
+            eol = _EOL_RE.search(buf, i)
+            if eol is None:
+                j = len(buf)
+                line = buf[i:]
+            else:
+                j = eol.end()
+                line = buf[i : eol.start()] + b"\n"
+            n_lines += 1
+            if not is_trigger(line):
+                need -= 1
+                if not need:
+                    return base + j, n_lines
+            i = j
+        base += len(buf)
+    return end, n_lines
+
+
+def _extract_shard(
+    input_path: str,
+    start: int,
+    end: int,
+    rules: Rules,
+    include_separators: bool,
+    line_no: int,
+    settle: bool,
+) -> tuple[int, bytearray, list[int], int]:
+    """Worker side of _run_parallel: extract bytes [start, end) of the input.
+
+    With `settle`, the shard's head depends on countdowns carried over from
+    earlier shards, so it is only replayed here to learn the countdowns at
+    its end and left for the parent to emit. Returns (head end offset,
+    output after the head, final countdowns, lines in the shard).
+    """
+    c = _compiled_for(_rules_key(rules))
+    run = _run_lines if rules.regex else _run_sparse
+    active = [0] * len(c.after_by_idx)
+    out = bytearray()
+    with open(input_path, "rb") as fin, mmap.mmap(
+        fin.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        head_end, head_lines = start, 0
+        if settle:
+            head_end, head_lines = _settle_point(mm, start, end, c)
+            head = _fold_newlines(_iter_mmap_blocks(mm, start, head_end))
+            for _ in run(head, c, bytearray(), rules, False, active=active):
+                pass
+        total = line_no + head_lines
+        tail = _fold_newlines(_iter_mmap_blocks(mm, head_end, end))
+        for total in run(
+            tail, c, out, rules, include_separators, active=active, line_no=total
+        ):
+            pass
+    return head_end, out, active, total - line_no
+
+
+def _count_newlines(input_path: str, start: int, end: int) -> int:
+    with open(input_path, "rb") as fin, mmap.mmap(
+        fin.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        # Lines as text mode read them: "\r\n", a lone "\r" and "\n" each end one
+        return sum(
+            buf.count(b"\n") + buf.count(b"\r") - buf.count(b"\r\n")
+            for buf in _iter_mmap_blocks(mm, start, end)
+        )
+
+
+def _parallel_jobs(fin: BinaryIO, jobs: int | None) -> int:
+    # Process start-up only pays off on big regular files
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs < 2:
+        return 1
+    try:
+        st = os.fstat(fin.fileno())
+    except (OSError, ValueError):
+        return 1
+    if not stat.S_ISREG(st.st_mode) or st.st_size < _PARALLEL_MIN_SIZE:
+        return 1
+    return jobs
+
+
+def _shard_bounds(mm: mmap.mmap, jobs: int) -> list[tuple[int, int]]:
+    # (start, end) of shards of about _SHARD_SIZE bytes, `jobs` or more when
+    # there are enough lines, each starting right after a "\n"
+    size = len(mm)
+    n_shards = max(jobs, -(-size // _SHARD_SIZE))
+    bounds = [0]
+    for i in range(1, n_shards):
+        nl = mm.find(b"\n", max(i * size // n_shards, bounds[-1]))
+        if nl < 0:
+            break
+        if nl + 1 < size:
+            bounds.append(nl + 1)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _run_parallel(
+    input_path: str,
+    fin: BinaryIO,
+    c: CompiledRules,
+    out: bytearray,
+    rules: Rules,
+    include_separators: bool,
+    jobs: int,
+) -> Iterator[int]:
+    """Extract newline-aligned shards on `jobs` processes, in order.
+
+    Same contract as _run_sparse. Each worker starts its shard with no
+    countdowns armed; this process replays only the shard heads (see
+    _settle_point) with the countdowns actually carried in, so the output
+    is identical to a sequential run. Yields after each shard.
+    """
+    run = _run_lines if rules.regex else _run_sparse
+    active = [0] * len(c.after_by_idx)
+    mm = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+    # spawn, not fork: callers (GUI/TUI) run this from a worker thread
+    pool = ProcessPoolExecutor(
+        max_workers=jobs, mp_context=multiprocessing.get_context("spawn")
+    )
+    try:
+        shards = _shard_bounds(mm, jobs)
+
+        # Separators carry absolute line numbers, so shards need their first
+        first_lines = [0] * len(shards)
+        if include_separators:
+            counts = pool.map(
+                _count_newlines,
+                [input_path] * len(shards),
+                *zip(*shards),
+            )
+            total = 0
+            for k, n in enumerate(counts):
+                first_lines[k] = total
+                total += n
+
+        # A bounded window of shards in flight keeps results from piling up
+        todo = iter(enumerate(shards))
+        futures = deque()
+
+        def fill():
+            for k, (start, end) in todo:
+                future = pool.submit(
+                    _extract_shard,
+                    input_path,
+                    start,
+                    end,
+                    rules,
+                    include_separators,
+                    first_lines[k],
+                    k > 0,
+                )
+                futures.append((start, end, future))
+                if len(futures) >= 2 * jobs:
+                    return
+
+        fill()
+        line_no = 0
+        while futures:
+            start, end, future = futures.popleft()
+            head_end, shard_out, shard_active, n_lines = future.result()
+            fill()
+            if head_end > start:
+                head = _fold_newlines(_iter_mmap_blocks(mm, start, head_end))
+                for _ in run(
+                    head,
+                    c,
+                    out,
+                    rules,
+                    include_separators,
+                    active=active,
+                    line_no=line_no,
+                ):
+                    pass
+            if head_end < end:
+                active[:] = shard_active
+            out += shard_out
+            line_no += n_lines
+            yield line_no
+    finally:
+        # Waits only for shards already running; an unjoined pool makes
+        # interpreter exit fail on its closed wakeup pipe
+        pool.shutdown(cancel_futures=True)
+        mm.close()
 
 
 def extract_file(
@@ -44,87 +898,52 @@ def extract_file(
     include_separators: bool = False,
     progress_cb: ProgressCb | None = None,
     cancel_event: threading.Event | None = None,
+    jobs: int | None = 1,
 ):
-    include_literals, include_regexes = _compile_patterns(
-        rules.include, rules.regex
-    )
+    """Extract kept lines of `input_path` into `output_path` (stdout if None).
 
-    triggers = [b.trigger for b in rules.blocks]
-    trig_literals, trig_regexes = _compile_patterns(triggers, rules.regex)
-    after_by_idx = [b.after for b in rules.blocks]
+    With `jobs` > 1 (None: one per CPU), big regular files are split across
+    that many processes. Those are started with "spawn", which re-imports
+    the calling script, so a script passing it needs an
+    ``if __name__ == "__main__":`` guard. The default, 1, keeps everything
+    in this process.
+    """
+    c = _compiled_for(_rules_key(rules))
 
-    active = [0] * len(rules.blocks)
-
-    fin = open(input_path, "r", encoding="utf-8", errors="replace")
-    fout = (
-        open(output_path, "w", encoding="utf-8", errors="replace")
-        if output_path
-        else None
-    )
-
-    def emit(s: str):
-        if fout:
-            fout.write(s)
-        else:
-            print(s, end="")
+    fin = open(input_path, "rb", buffering=_READ_BLOCK)
+    fout = open(output_path, "wb", buffering=_READ_BLOCK) if output_path else None
+    write = fout.write if fout else sys.stdout.buffer.write
+    out = bytearray()
 
+    jobs = _parallel_jobs(fin, jobs)
+    if jobs > 1:
+        progress = _run_parallel(
+            input_path, fin, c, out, rules, include_separators, jobs
+        )
+    else:
+        run = _run_lines if rules.regex else _run_sparse
+        progress = run(_iter_blocks(fin), c, out, rules, include_separators)
     try:
         line_no = 0
-        for line in fin:
-            line_no += 1
+        for line_no in progress:
+            if len(out) >= _WRITE_BLOCK:
+                write(out)
+                out.clear()
 
+            # Cancellation and progress are handled once per block, not per line
             if cancel_event is not None and cancel_event.is_set():
                 break
-
-            print_this = False
-
-            # A) Include rules
-            if rules.include and _matches(
-                line, include_literals, include_regexes
-            ):
-                print_this = True
-
-            # B) Block rules
-            if rules.blocks:
-                hit_idxs: list[int]
-                if trig_literals is not None:
-                    hit_idxs = [
-                        i
-                        for i, t in enumerate(trig_literals)
-                        if t in line
-                    ]
-                else:
-                    hit_idxs = [
-                        i
-                        for i, r in enumerate(trig_regexes or [])
-                        if r.search(line)
-                    ]
-
-                if hit_idxs:
-                    print_this = True
-                    for i in hit_idxs:
-                        active[i] = max(active[i], after_by_idx[i])
-
-                    if include_separators:
-                        emit(
-                            "\n"
-                            f"----- BLOCK TRIGGER @ line {line_no} "
-                            f"(matched {len(hit_idxs)} rule(s)) -----\n"
-                        )
-                elif any(x > 0 for x in active):
-                    print_this = True
-                    active = [max(0, x - 1) for x in active]
-
-            if print_this:
-                out = _strip_timestamp_line(line) if rules.strip_timestamps else line
-                emit(out)
-
-            if progress_cb and (line_no % 5000 == 0):
+            if progress_cb:
                 progress_cb(line_no, False)
 
         if progress_cb:
             progress_cb(line_no, True)
     finally:
+        progress.close()
         fin.close()
+        if out:
+            write(out)
         if fout:
-            fout.close()
\ No newline at end of file
+            fout.close()
+        else:
+            sys.stdout.buffer.flush()
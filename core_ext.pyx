@@ -0,0 +1,217 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Optional C version of literal mode's per-block loop (see core._run_sparse).
+
+Build in place with ``cythonize -i core_ext.pyx``; without it core.py uses
+the pure Python path, which produces the same output.
+"""
+
+from cpython.bytearray cimport PyByteArray_AS_STRING, PyByteArray_GET_SIZE, PyByteArray_Resize
+from libc.stdint cimport int64_t, uint64_t
+from libc.stdlib cimport free, malloc, realloc
+from libc.string cimport memchr, memcpy
+
+cdef extern from *:
+    """
+    #include <string.h>
+    #if defined(_WIN32)
+    static const void *dx_memmem(const void *h, size_t hn, const void *n, size_t nn)
+    {
+        const unsigned char *p = (const unsigned char *)h;
+        const unsigned char *last;
+        if (nn > hn)
+            return NULL;
+        last = p + (hn - nn);
+        while (p <= last) {
+            p = (const unsigned char *)memchr(p, *(const unsigned char *)n, last - p + 1);
+            if (p == NULL)
+                return NULL;
+            if (memcmp(p, n, nn) == 0)
+                return p;
+            p++;
+        }
+        return NULL;
+    }
+    #else
+    #define dx_memmem memmem
+    #endif
+    """
+    const void *dx_memmem(const void *h, size_t hn, const void *n, size_t nn) nogil
+
+# Hit masks are uint64: bit i is block rule i, the include bit is above them
+cdef enum:
+    _MAX_BLOCKS = 63
+
+MAX_BLOCKS = _MAX_BLOCKS
+
+
+# A run of kept lines, [start, end) in the block; sep_idx is the index of the
+# trigger line it opens with when a separator goes before it, else -1
+cdef struct _Span:
+    Py_ssize_t start
+    Py_ssize_t end
+    Py_ssize_t sep_idx
+    Py_ssize_t n_hit
+
+
+cdef int _push(_Span **spans, Py_ssize_t *n, Py_ssize_t *cap, Py_ssize_t start,
+               Py_ssize_t end, Py_ssize_t sep_idx, Py_ssize_t n_hit) noexcept nogil:
+    cdef _Span *grown
+    if n[0] == cap[0]:
+        grown = <_Span *>realloc(spans[0], (2 * cap[0] + 16) * sizeof(_Span))
+        if grown == NULL:
+            return -1
+        spans[0] = grown
+        cap[0] = 2 * cap[0] + 16
+    spans[0][n[0]] = _Span(start, end, sep_idx, n_hit)
+    n[0] += 1
+    return 0
+
+
+cdef int _append(bytearray out, const char *src, Py_ssize_t n) except -1:
+    cdef Py_ssize_t size = PyByteArray_GET_SIZE(out)
+    if n <= 0:
+        return 0
+    PyByteArray_Resize(out, size + n)
+    memcpy(PyByteArray_AS_STRING(out) + size, src, n)
+    return 0
+
+
+def extract_block(
+    bytes buf,
+    tuple literal_bits,
+    uint64_t inc_bit,
+    tuple after_by_idx,
+    list active,
+    bytearray out,
+    bint include_separators,
+    bytes separator,
+    Py_ssize_t line_no,
+):
+    """Append the kept lines of one newline-aligned block to `out`.
+
+    `literal_bits` is CompiledRules.literal_bits, `separator` the %-template
+    written before trigger lines. `active` is updated in place. Returns the
+    number of lines in the block.
+
+    The line walk runs without the GIL and only records the kept spans;
+    they are copied to `out` afterwards.
+    """
+    cdef Py_ssize_t n_blocks = len(after_by_idx)
+    if n_blocks > _MAX_BLOCKS:
+        raise ValueError(f"at most {MAX_BLOCKS} block rules")
+
+    cdef const char *p = buf
+    cdef Py_ssize_t n = len(buf)
+    cdef Py_ssize_t n_pats = len(literal_bits)
+    cdef const char **pats = <const char **>malloc(n_pats * sizeof(char *) + 1)
+    cdef Py_ssize_t *plens = <Py_ssize_t *>malloc(n_pats * sizeof(Py_ssize_t) + 1)
+    cdef uint64_t *bits = <uint64_t *>malloc(n_pats * sizeof(uint64_t) + 1)
+    cdef _Span *spans = NULL
+    cdef Py_ssize_t n_spans = 0, cap = 0
+    cdef int64_t counts[_MAX_BLOCKS]
+    cdef int64_t afters[_MAX_BLOCKS]
+    cdef uint64_t trig_bits = inc_bit - 1
+    cdef uint64_t alive = 0
+    cdef uint64_t m, trig, bit
+    cdef Py_ssize_t k, b, pos = 0, end, nxt, idx = 0, span = -1, span_sep = -1, span_hit = 0, n_hit
+    cdef const char *nl
+    cdef bint keep
+    cdef int failed = 0
+    cdef int newline = ord("\n")
+
+    if pats == NULL or plens == NULL or bits == NULL:
+        free(pats)
+        free(plens)
+        free(bits)
+        raise MemoryError()
+    try:
+        # The tuple keeps the pattern bytes alive for the whole call
+        for k in range(n_pats):
+            pat, pat_bits = literal_bits[k]
+            pats[k] = <bytes>pat
+            plens[k] = len(pat)
+            bits[k] = pat_bits
+        for b in range(n_blocks):
+            counts[b] = active[b]
+            afters[b] = after_by_idx[b]
+            if counts[b] > 0:
+                alive |= (<uint64_t>1) << b
+
+        with nogil:
+            while pos < n:
+                nl = <const char *>memchr(p + pos, newline, n - pos)
+                end = n if nl == NULL else nl - p
+                nxt = n if nl == NULL else end + 1
+
+                # The line is searched with its "\n", as text mode read it
+                m = 0
+                for k in range(n_pats):
+                    if (m & bits[k]) == bits[k]:
+                        continue
+                    if plens[k] == 0 or (
+                        plens[k] <= nxt - pos
+                        and dx_memmem(p + pos, nxt - pos, pats[k], plens[k]) != NULL
+                    ):
+                        m |= bits[k]
+
+                trig = m & trig_bits
+                if trig:
+                    keep = True
+                    for b in range(n_blocks):
+                        bit = (<uint64_t>1) << b
+                        if trig & bit and afters[b] > counts[b]:
+                            counts[b] = afters[b]
+                            alive |= bit
+                elif alive:
+                    keep = True
+                    for b in range(n_blocks):
+                        bit = (<uint64_t>1) << b
+                        if alive & bit:
+                            counts[b] -= 1
+                            if counts[b] == 0:
+                                alive ^= bit
+                else:
+                    keep = (m & inc_bit) != 0
+
+                if keep:
+                    if include_separators and trig:
+                        if span >= 0 and _push(&spans, &n_spans, &cap, span, pos, span_sep, span_hit):
+                            failed = 1
+                            break
+                        n_hit = 0
+                        while trig:
+                            trig &= trig - 1
+                            n_hit += 1
+                        span = pos
+                        span_sep = idx
+                        span_hit = n_hit
+                    elif span < 0:
+                        span = pos
+                        span_sep = -1
+                elif span >= 0:
+                    if _push(&spans, &n_spans, &cap, span, pos, span_sep, span_hit):
+                        failed = 1
+                        break
+                    span = -1
+
+                pos = nxt
+                idx += 1
+
+            if not failed and span >= 0:
+                failed = _push(&spans, &n_spans, &cap, span, n, span_sep, span_hit)
+
+        if failed:
+            raise MemoryError()
+        for k in range(n_spans):
+            if spans[k].sep_idx >= 0:
+                sep = separator % (line_no + spans[k].sep_idx + 1, spans[k].n_hit)
+                _append(out, <bytes>sep, len(sep))
+            _append(out, p + spans[k].start, spans[k].end - spans[k].start)
+        for b in range(n_blocks):
+            active[b] = counts[b]
+        return idx
+    finally:
+        free(pats)
+        free(plens)
+        free(bits)
+        free(spans)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import functools
+
+try:
+    import numpy as np
+    from numba import njit  # optional: pip install numba
+except ImportError:
+    np = None
+    njit = None
+
+
+# Per-line hit masks: bit i is block rule i's trigger, bit n_blocks is the
+# include bit. The compiled kernel needs them to fit a uint64.
+MAX_KERNEL_BLOCKS = 63
+
+
+def _alive_mask(active: list[int]) -> int:
+    alive = 0
+    for b, x in enumerate(active):
+        if x > 0:
+            alive |= 1 << b
+    return alive
+
+
+def _decide_py(
+    masks: list[int],
+    inc_bit: int,
+    after_by_idx: tuple[int, ...],
+    active: list[int],
+) -> list[bool]:
+    # `alive` has bit b set while active[b] > 0, so the common "nothing
+    # armed" case is one int test and a tick only touches armed counters.
+    trig_bits = inc_bit - 1
+    alive = _alive_mask(active)
+    out: list[bool] = []
+    append = out.append
+    for m in masks:
+        trig = m & trig_bits
+        if trig:
+            while trig:
+                low = trig & -trig
+                b = low.bit_length() - 1
+                if after_by_idx[b] > active[b]:
+                    active[b] = after_by_idx[b]
+                    alive |= low
+                trig ^= low
+            append(True)
+        elif alive:
+            append(True)
+            bits = alive
+            while bits:
+                low = bits & -bits
+                b = low.bit_length() - 1
+                active[b] -= 1
+                if not active[b]:
+                    alive ^= low
+                bits ^= low
+        else:
+            append(bool(m & inc_bit))
+    return out
+
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _decide_kernel(n_lines, hit_mask, inc_bit, after_by_idx, active, emit_out):
+        n_blocks = after_by_idx.shape[0]
+        zero = np.uint64(0)
+        one = np.uint64(1)
+        trig_bits = inc_bit - one
+        alive = zero
+        for b in range(n_blocks):
+            if active[b] > 0:
+                alive |= one << np.uint64(b)
+        for i in range(n_lines):
+            m = hit_mask[i]
+            trig = m & trig_bits
+            if trig != zero:
+                for b in range(n_blocks):
+                    bit = one << np.uint64(b)
+                    if trig & bit and after_by_idx[b] > active[b]:
+                        active[b] = after_by_idx[b]
+                        alive |= bit
+                emit_out[i] = True
+            elif alive != zero:
+                for b in range(n_blocks):
+                    bit = one << np.uint64(b)
+                    if alive & bit:
+                        active[b] -= 1
+                        if active[b] == 0:
+                            alive ^= bit
+                emit_out[i] = True
+            else:
+                emit_out[i] = (m & inc_bit) != zero
+
+else:
+    _decide_kernel = None
+
+
+@functools.lru_cache(maxsize=32)
+def _after_array(after_by_idx: tuple[int, ...]):
+    # Built once per rule set rather than once per block
+    return np.array(after_by_idx, dtype=np.int64)
+
+
+def decide(
+    masks: list[int],
+    inc_bit: int,
+    after_by_idx: tuple[int, ...],
+    active: list[int],
+) -> list[bool]:
+    """Return the per-line "emit" flags for one block of hit masks.
+
+    A trigger hit (re)arms its rule's countdown and emits the line; otherwise
+    any armed countdown emits the line and all countdowns tick down by one;
+    otherwise the include bit decides. `active` carries the countdowns across
+    blocks and is updated in place.
+    """
+    if _decide_kernel is None or len(after_by_idx) > MAX_KERNEL_BLOCKS:
+        return _decide_py(masks, inc_bit, after_by_idx, active)
+
+    emit_out = np.zeros(len(masks), dtype=np.bool_)
+    active_arr = np.array(active, dtype=np.int64)
+    _decide_kernel(
+        len(masks),
+        np.array(masks, dtype=np.uint64),
+        np.uint64(inc_bit),
+        _after_array(after_by_idx),
+        active_arr,
+        emit_out,
+    )
+    active[:] = active_arr.tolist()
+    return emit_out.tolist()
+
+
+def decide_ranges(
+    events: list[tuple[int, int, int]],
+    n_lines: int,
+    inc_bit: int,
+    after_by_idx: tuple[int, ...],
+    active: list[int],
+) -> list[tuple[int, int]]:
+    """Like decide, but from only the lines that hit something.
+
+    `events` are (line_idx, mask, ...) in line order for one block of
+    `n_lines` lines. Every other line hits nothing: while a countdown is
+    armed it is emitted and all countdowns tick, so a gap of g such lines
+    emits the first min(g, max(active)) of them. Returns merged half-open
+    [first, last) line ranges to emit; `active` is updated in place.
+    """
+    trig_bits = inc_bit - 1
+    # Same alive bitmask as _decide_py: ticks only touch armed countdowns
+    alive = _alive_mask(active)
+    ranges: list[list[int]] = []
+
+    def add(first: int, last: int):
+        if ranges and ranges[-1][1] == first:
+            ranges[-1][1] = last
+        else:
+            ranges.append([first, last])
+
+    def tick(count: int) -> int:
+        # Count every armed countdown down by `count` (saturating at 0);
+        # returns the longest one before the tick.
+        nonlocal alive
+        run = 0
+        bits = alive
+        while bits:
+            low = bits & -bits
+            b = low.bit_length() - 1
+            x = active[b]
+            if x > run:
+                run = x
+            if x > count:
+                active[b] = x - count
+            else:
+                active[b] = 0
+                alive ^= low
+            bits ^= low
+        return run
+
+    pos = 0
+    for idx, m, *_ in events:
+        if idx > pos and alive:
+            add(pos, pos + min(idx - pos, tick(idx - pos)))
+        trig = m & trig_bits
+        if trig:
+            while trig:
+                low = trig & -trig
+                b = low.bit_length() - 1
+                if after_by_idx[b] > active[b]:
+                    active[b] = after_by_idx[b]
+                    alive |= low
+                trig ^= low
+        elif alive:
+            # An include-only line is emitted and still ticks countdowns
+            tick(1)
+        add(idx, idx + 1)
+        pos = idx + 1
+    if n_lines > pos and alive:
+        add(pos, pos + min(n_lines - pos, tick(n_lines - pos)))
+    return [(first, last) for first, last in ranges]
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import re
+from typing import Callable
+
+try:
+    import hyperscan  # optional: pip install hyperscan
+except ImportError:
+    hyperscan = None
+
+
+# Regex patterns left to `re` even with Hyperscan installed: `$` / \Z
+# matches are unreliable there (dropped or not depending on what else is
+# in the database), {,n} is a literal and [:alpha:] a POSIX class in PCRE.
+# UCP's \s, \w and \d follow another Unicode version than Python's (\s
+# misses \x1c-\x1f, \w and \d thousands of newer letters and digits), so
+# those classes and the \b / \B built on \w stay with `re` too.
+_HS_UNSAFE_RE = re.compile(r"\$|\\[ZsSwWdDbB]|\{,|\[:")
+
+# Case-insensitive, Python also pairs i/I with U+0130/U+0131 (and a few
+# other non-ASCII letters); patterns under an `i` flag that could touch
+# those (i or I, a class, an escape or non-ASCII text) stay with `re`
+_HS_FLAGS_RE = re.compile(r"\(\?[aiLmsux-]+[:)]")
+_HS_CASELESS_UNSAFE_RE = re.compile(r"[iI\[\\]|[^\x00-\x7f]")
+
+
+def _unsafe(pattern: str) -> bool:
+    if _HS_UNSAFE_RE.search(pattern):
+        return True
+    flags = _HS_FLAGS_RE.findall(pattern)
+    return any("i" in f for f in flags) and bool(
+        _HS_CASELESS_UNSAFE_RE.search(_HS_FLAGS_RE.sub("", pattern))
+    )
+
+
+def build_database(patterns: list[str]):
+    """Compile regex patterns into one Hyperscan database; match ids are list
+    indices. Returns None when hyperscan isn't installed or rejects a pattern
+    (its syntax is close to, but not exactly, Python's)."""
+    if hyperscan is None or not patterns:
+        return None
+    if any(_unsafe(p) for p in patterns):
+        return None
+    flags = (
+        hyperscan.HS_FLAG_SINGLEMATCH
+        | hyperscan.HS_FLAG_UTF8
+        | hyperscan.HS_FLAG_UCP
+        | hyperscan.HS_FLAG_ALLOWEMPTY
+    )
+    db = hyperscan.Database()
+    try:
+        db.compile(
+            expressions=[p.encode("utf-8") for p in patterns],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=[flags] * len(patterns),
+        )
+    except hyperscan.error:
+        return None
+    return db
+
+
+def line_matcher(db) -> Callable[[bytes], list[int]]:
+    """Return match(line), the ids of the patterns in `db` that match `line`.
+
+    `line` must be valid UTF-8 (the database is in UTF-8 mode, which is
+    undefined on anything else) and end with "\n": a match on an
+    unterminated last line may depend on nothing following it, so that line
+    is left to `re`. The returned list is reused by the next call, and the
+    matcher owns scratch space, so it can't be shared between threads.
+    """
+    scan = db.scan
+    scratch = hyperscan.Scratch(db)
+    hits: list[int] = []
+
+    def on_match(idx, start, end, flags, line_len):
+        # Matches come in end-offset order, so with SINGLEMATCH a pattern
+        # whose first match runs into the sentinel has no match in the line
+        if end <= line_len:
+            hits.append(idx)
+
+    def match(line: bytes) -> list[int]:
+        # This Hyperscan build can miss a match that ends exactly at the end
+        # of the data (lines over ~16 bytes, several patterns), so the line
+        # is scanned with a "\0" after it and matches past the line dropped
+        hits.clear()
+        scan(
+            line + b"\0",
+            match_event_handler=on_match,
+            context=len(line),
+            scratch=scratch,
+        )
+        return hits
+
+    return match
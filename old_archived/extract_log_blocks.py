@@ -20,10 +20,11 @@ def extract(log_path, pnp_out, debug_out, num_lines, show_counts):
     debug_count = 0
     debug_blocks = 0
 
-    # Open output files (text mode)
-    with open(log_path, 'r', encoding='utf-8', errors='ignore') as fin, \
-         open(pnp_out, 'w', encoding='utf-8', errors='ignore') as fpnp, \
-         open(debug_out, 'w', encoding='utf-8', errors='ignore') as fdebug:
+    # Binary in and out: lines are matched and written as bytes, so there is
+    # no decode/encode round-trip per line
+    with open(log_path, 'rb') as fin, \
+         open(pnp_out, 'wb') as fpnp, \
+         open(debug_out, 'wb') as fdebug:
 
         iterator = iter(fin)
         lineno = 0
@@ -31,16 +32,16 @@ def extract(log_path, pnp_out, debug_out, num_lines, show_counts):
         for line in iterator:
             lineno += 1
             # Check for PnP lines
-            if "LogTemp: [PnP]" in line:
+            if b"LogTemp: [PnP]" in line:
                 pnp_count += 1
-                fpnp.write(f"{lineno}: {line.rstrip()}\n")
+                fpnp.write(b"%d: %s\n" % (lineno, line.rstrip()))
 
             # Check for DebugLogSharedTagPositions and capture block
-            if "LogTemp: === DebugLogSharedTagPositions" in line:
+            if b"LogTemp: === DebugLogSharedTagPositions" in line:
                 debug_blocks += 1
                 debug_count += 1  # counting the header line itself
-                fdebug.write(f"\n=== DEBUG BLOCK {debug_blocks} START (line {lineno}) ===\n")
-                fdebug.write(f"{lineno}: {line.rstrip()}\n")
+                fdebug.write(b"\n=== DEBUG BLOCK %d START (line %d) ===\n" % (debug_blocks, lineno))
+                fdebug.write(b"%d: %s\n" % (lineno, line.rstrip()))
 
                 # write the following `num_lines` lines (or until EOF)
                 for i in range(num_lines):
@@ -48,7 +49,7 @@ def extract(log_path, pnp_out, debug_out, num_lines, show_counts):
                         next_line = next(iterator)
                         lineno += 1
                         debug_count += 1
-                        fdebug.write(f"{lineno}: {next_line.rstrip()}\n")
+                        fdebug.write(b"%d: %s\n" % (lineno, next_line.rstrip()))
                     except StopIteration:
                         break
 
@@ -16,20 +16,22 @@ Behavior:
 """
 
 import argparse
-import re
 import sys
 
-# pattern to remove one or more leading bracketed blocks like:
-# [2026.02.16-09.21.45:449][566]  (or any sequence of [ ... ] groups) at start of line
-_LEADING_BRACKETED_RE = re.compile(r'^(?:\[[^\]]*\]\s*)+')
-
 def clean_line(line: str) -> str:
     """
-    Remove any leading bracketed timestamp/ID groups from the start of `line`,
+    Remove any leading bracketed timestamp/ID groups from the start of `line`
+    (e.g. "[2026.02.16-09.21.45:449][566]", or any sequence of [ ... ] groups),
     and strip trailing newline.
+    Hand-rolled with str.find instead of a regex: the pattern is just a run of
+    anchored [ ... ] groups, so this stays on C-level substring search.
     """
     s = line.rstrip("\r\n")
-    s = _LEADING_BRACKETED_RE.sub("", s)
+    while s.startswith("["):
+        end = s.find("]")
+        if end < 0:
+            break
+        s = s[end + 1:].lstrip()
     return s.lstrip()  # also remove any space after the bracket groups
 
 def extract(log_path, pnp_out, debug_out, num_lines, show_counts):
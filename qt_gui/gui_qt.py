@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import threading
+import time
 from dataclasses import dataclass
 
 from PySide6.QtCore import QThread, Signal
@@ -33,6 +34,10 @@ except ImportError:
     from core import extract_file
     from rules import BlockRule, Rules
 
+# Progress signals are capped at ~20 per second; each emit posts a
+# cross-thread event, and the label can't usefully update faster anyway
+_PROGRESS_INTERVAL = 0.05
+
 
 class TextPrompt(QDialog):
     def __init__(self, title: str, label: str, initial: str = ""):
@@ -82,11 +87,16 @@ class ExtractWorker(QThread):
 
     def run(self):
         last = 0
+        last_emit = 0.0
 
         def cb(lines: int, finished: bool):
-            nonlocal last
+            nonlocal last, last_emit
             last = lines
-            if not finished:
+            if finished:
+                return  # the final count goes out with `done`
+            now = time.monotonic()
+            if now - last_emit >= _PROGRESS_INTERVAL:
+                last_emit = now
                 self.progress.emit(lines)
 
         try:
@@ -97,6 +107,7 @@ class ExtractWorker(QThread):
                 include_separators=self.separators,
                 progress_cb=cb,
                 cancel_event=self.cancel_event,
+                jobs=None,  # one process per CPU for big files
             )
             cancelled = self.cancel_event.is_set()
             msg = "Cancelled" if cancelled else "Completed"
@@ -113,6 +124,8 @@ class MainWindow(QMainWindow):
 
         self.cancel_event = threading.Event()
         self.worker: ExtractWorker | None = None
+        # Built on first use and dropped on any rule edit (see current_rules)
+        self._rules: Rules | None = None
 
         root = QWidget()
         self.setCentralWidget(root)
@@ -246,6 +259,14 @@ class MainWindow(QMainWindow):
             "LogTemp: === DebugLogSharedTagPositions", 100
         )
 
+        # Model signals also catch in-place edits of table cells
+        for model in (self.include_list.model(), self.block_table.model()):
+            model.rowsInserted.connect(self.rules_changed)
+            model.rowsRemoved.connect(self.rules_changed)
+            model.dataChanged.connect(self.rules_changed)
+        self.regex_cb.toggled.connect(self.rules_changed)
+        self.default_after.valueChanged.connect(self.rules_changed)
+
     def pick_input(self):
         path, _ = QFileDialog.getOpenFileName(
             self, "Select input log"
@@ -345,6 +366,15 @@ class MainWindow(QMainWindow):
         if r >= 0:
             self.block_table.removeRow(r)
 
+    def rules_changed(self, *_):
+        self._rules = None
+
+    def current_rules(self) -> Rules:
+        # Re-runs with untouched rules reuse the same Rules (and compile cache)
+        if self._rules is None:
+            self._rules = self.build_rules()
+        return self._rules
+
     def build_rules(self) -> Rules:
         include = [
             self.include_list.item(i).text()
@@ -378,7 +408,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Missing output", "Pick an output file.")
             return
 
-        rules = self.build_rules()
+        rules = self.current_rules()
         if not rules.include and not rules.blocks:
             QMessageBox.warning(
                 self, "No rules", "Add at least one include or block rule."
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import NamedTuple
 
 
-@dataclass(frozen=True)
-class BlockRule:
+class BlockRule(NamedTuple):
+    # A tuple, so reading a field is plain tuple indexing
     trigger: str
     after: int = 100
 
 
 @dataclass(frozen=True)
 class Rules:
-    include: list[str]
-    blocks: list[BlockRule]
+    include: tuple[str, ...]
+    blocks: tuple[BlockRule, ...]
     regex: bool = False
-    strip_timestamps: bool = False
\ No newline at end of file
+    strip_timestamps: bool = False
+
+    def __post_init__(self):
+        # Lists are accepted but stored as tuples so Rules stays hashable
+        object.__setattr__(self, "include", tuple(self.include))
+        object.__setattr__(self, "blocks", tuple(self.blocks))
@@ -0,0 +1,55 @@
+import os
+import random
+import sys
+
+# The modules are run as scripts rather than installed, from the repo root
+# (core.py and friends) or from qt_gui/ (log_extract.py)
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [_ROOT, os.path.join(_ROOT, "qt_gui")]
+
+# Random logs and rule sets for the tests that check two ways of extracting
+# the same input against each other
+TOKENS = [
+    b"a", b"b", b"c", b"o", b"foo", b"error", b"ERROR ", b"code=12", b" ",
+    b"[x]", b"[2026.02.17-13.05.15:784]", b"LogTemp:", b"failed", b"timeout",
+    b"\xff", b"\xc3\xa9", b"\x0c", b"\x1c",
+]
+EOLS = [b"\n", b"\n", b"\n", b"\r\n", b"\r"]
+LITERALS = [
+    "ERROR", "foo", "LogTemp:", "x]", "c\n", "timeout", "o", "\xe9", "a", "b",
+    "failed", "code=", "[x]", "Error", "ERROR f", "oo", "FOO", "\x1c",
+]
+REGEXES = [
+    "ERROR\\s", "[Ee]rror", "code=\\d+\\W", "failed\\s", "a+b", "^a", "oc",
+    "c\n", "[ab]c", "o[^a-z]", "foo\\s", "\\w+:\\[", "x\\]", "b.", "\\bfoo\\b",
+    "a.b", "timeout$", "ERROR ", "(?i)error", "code=[0-9]+[^a-z]", "failed[ \t]",
+    "fo+", "t[a-z]+t",
+]
+
+
+def random_log(rnd: random.Random, n_lines: int) -> bytes:
+    data = b"".join(
+        b"".join(rnd.choices(TOKENS, k=rnd.randint(0, 8))) + rnd.choice(EOLS)
+        for _ in range(n_lines)
+    )
+    # Sometimes an unterminated last line
+    return data + b"".join(rnd.choices(TOKENS, k=rnd.randint(0, 1)))
+
+
+def random_patterns(
+    rnd: random.Random, regex: bool, n_min: int = 0, pool: list[str] | None = None
+) -> tuple[list[str], list[tuple[str, int]]]:
+    # Includes and (trigger, after) pairs, for either module's Rules
+    pool = pool or (REGEXES if regex else LITERALS)
+    include = rnd.sample(pool, rnd.randint(n_min, n_min + 4))
+    blocks = [(p, rnd.randint(0, 5)) for p in rnd.sample(pool, rnd.randint(0, 3))]
+    return include, blocks
+
+
+def extract_bytes(tmp_path, data: bytes, run, *args, **kw) -> bytes:
+    # run(input path, output path, *args, **kw) on `data`; returns the output
+    src = tmp_path / "in.log"
+    out = tmp_path / "out.log"
+    src.write_bytes(data)
+    run(str(src), str(out), *args, **kw)
+    return out.read_bytes()
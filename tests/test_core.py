@@ -0,0 +1,150 @@
+import random
+
+import pytest
+
+import core
+import core_hs
+from conftest import extract_bytes, random_log, random_patterns
+from rules import BlockRule, Rules
+
+
+def _random_rules(rnd: random.Random, regex: bool, **kw) -> Rules:
+    include, blocks = random_patterns(rnd, regex, **kw)
+    return Rules(
+        include=include,
+        blocks=[BlockRule(t, a) for t, a in blocks],
+        regex=regex,
+        strip_timestamps=rnd.random() < 0.2,
+    )
+
+
+def _extract(tmp_path, data: bytes, rules: Rules, **kw) -> bytes:
+    return extract_bytes(tmp_path, data, core.extract_file, rules, **kw)
+
+
+@pytest.mark.parametrize("regex", [False, True])
+def test_sharded_matches_sequential(tmp_path, monkeypatch, regex):
+    # Tiny shards, so shard heads replay countdowns carried over from
+    # earlier shards and separators need the right first line numbers.
+    # Small reads, so heads span several windows.
+    monkeypatch.setattr(core, "_PARALLEL_MIN_SIZE", 0)
+    monkeypatch.setattr(core, "_SHARD_SIZE", 200)
+    monkeypatch.setattr(core, "_READ_BLOCK", 16)
+    rnd = random.Random(regex)
+    for _ in range(4):
+        data = random_log(rnd, 300)
+        rules = _random_rules(rnd, regex)
+        for separators in (False, True):
+            expected = _extract(tmp_path, data, rules, include_separators=separators, jobs=1)
+            got = _extract(tmp_path, data, rules, include_separators=separators, jobs=3)
+            assert got == expected, (data, rules, separators)
+
+
+def test_automaton_matches_find(tmp_path, monkeypatch):
+    # Enough distinct literals for literal mode to build the automaton
+    pytest.importorskip("ahocorasick")
+    rnd = random.Random(0)
+    for _ in range(100):
+        data = random_log(rnd, rnd.randint(1, 40))
+        rules = _random_rules(rnd, regex=False, n_min=core._AC_MIN_PATTERNS)
+        core._compiled_for.cache_clear()
+        assert core._compiled_for(core._rules_key(rules)).ac is not None
+        got = _extract(tmp_path, data, rules, include_separators=True, jobs=1)
+        with monkeypatch.context() as m:
+            m.setattr(core, "ahocorasick", None)
+            core._compiled_for.cache_clear()
+            expected = _extract(tmp_path, data, rules, include_separators=True, jobs=1)
+        assert got == expected, (data, rules)
+    core._compiled_for.cache_clear()
+
+
+def test_extension_matches_python(tmp_path, monkeypatch):
+    pytest.importorskip("core_ext")
+    assert core.extract_block is not None
+    # Small reads, so countdowns and line numbers cross block boundaries
+    monkeypatch.setattr(core, "_READ_BLOCK", 64)
+    rnd = random.Random(0)
+    for _ in range(200):
+        data = random_log(rnd, rnd.randint(1, 40))
+        rules = _random_rules(rnd, regex=False)
+        got = _extract(tmp_path, data, rules, include_separators=True, jobs=1)
+        with monkeypatch.context() as m:
+            m.setattr(core, "extract_block", None)
+            expected = _extract(tmp_path, data, rules, include_separators=True, jobs=1)
+        assert got == expected, (data, rules)
+
+
+def test_hyperscan_matches_re(tmp_path, monkeypatch):
+    pytest.importorskip("hyperscan")
+    rnd = random.Random(0)
+    for _ in range(300):
+        data = random_log(rnd, rnd.randint(1, 8))
+        rules = _random_rules(rnd, regex=True)
+        core._compiled_for.cache_clear()
+        got = _extract(tmp_path, data, rules, include_separators=True, jobs=1)
+        with monkeypatch.context() as m:
+            m.setattr(core_hs, "hyperscan", None)
+            core._compiled_for.cache_clear()
+            expected = _extract(tmp_path, data, rules, include_separators=True, jobs=1)
+        assert got == expected, (data, rules)
+    core._compiled_for.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "data, include, blocks",
+    [
+        # A match ending on the line's "\n"
+        (b"[x]aLogTemp:[x]fooc\n", ["c\n", "[ab]c", "a+b"], [BlockRule("^a", 0)]),
+        # Invalid UTF-8, which `re` sees as U+FFFD
+        (b"a\xffb\n", ["a.b"], []),
+    ],
+)
+def test_hyperscan_keeps_line(tmp_path, data, include, blocks):
+    pytest.importorskip("hyperscan")
+    rules = Rules(include=include, blocks=blocks, regex=True)
+    assert core._compiled_for(core._rules_key(rules)).hs_db is not None
+    assert _extract(tmp_path, data, rules, jobs=1) == data
+
+
+def test_hyperscan_leaves_unicode_classes_to_re(tmp_path):
+    # Python's \s matches \x1c-\x1f, Hyperscan's UCP \s doesn't
+    pytest.importorskip("hyperscan")
+    rules = Rules(include=["ERROR\\s", "oc"], blocks=[], regex=True)
+    assert core._compiled_for(core._rules_key(rules)).hs_db is None
+    assert _extract(tmp_path, b"ERROR\x1cx\nERRORx\n", rules, jobs=1) == b"ERROR\x1cx\n"
+
+
+def test_lone_cr_ends_a_line(tmp_path):
+    data = b"progress 10%\rprogress 100%\rERROR disk full\nnext\nnext2\n"
+    rules = Rules(include=["ERROR"], blocks=[BlockRule("progress", 1)])
+    assert _extract(tmp_path, data, rules, include_separators=True, jobs=1) == (
+        b"\n----- BLOCK TRIGGER @ line 1 (matched 1 rule(s)) -----\n"
+        b"progress 10%\n"
+        b"\n----- BLOCK TRIGGER @ line 2 (matched 1 rule(s)) -----\n"
+        b"progress 100%\n"
+        b"ERROR disk full\n"
+    )
+
+
+@pytest.mark.parametrize(
+    "include, blocks",
+    [
+        (["(?i)error", "foo"], []),
+        ([], [BlockRule("(?i)error", 0), BlockRule("foo", 0)]),
+    ],
+)
+def test_inline_flag_stays_with_its_pattern(tmp_path, monkeypatch, include, blocks):
+    # Joined into one alternation, Python 3.10 applied (?i) to "foo" too
+    monkeypatch.setattr(core_hs, "hyperscan", None)
+    core._compiled_for.cache_clear()
+    rules = Rules(include=include, blocks=blocks, regex=True)
+    assert _extract(tmp_path, b"Error one\nFOO two\nfoo three\n", rules, jobs=1) == (
+        b"Error one\nfoo three\n"
+    )
+    core._compiled_for.cache_clear()
+
+
+def test_strip_timestamps_takes_unicode_whitespace(tmp_path):
+    data = b"[x]\xc2\xa0\xe2\x80\xa8 foo\xff\n\xc2\x85\x1cfoo two\n[x]\x1ffoo\n"
+    rules = Rules(include=["foo"], blocks=[], strip_timestamps=True)
+    assert _extract(tmp_path, data, rules, jobs=1) == b"foo\xff\nfoo two\nfoo\n"
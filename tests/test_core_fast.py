@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+import core_fast
+
+
+def _random_masks(rnd: random.Random, n_blocks: int) -> list[int]:
+    # Mostly lines that hit nothing, as in real logs
+    return [
+        rnd.getrandbits(n_blocks + 1) if rnd.random() < 0.3 else 0
+        for _ in range(rnd.randint(0, 60))
+    ]
+
+
+def _emit_flags(ranges: list[tuple[int, int]], n_lines: int) -> list[bool]:
+    flags = [False] * n_lines
+    for first, last in ranges:
+        flags[first:last] = [True] * (last - first)
+    return flags
+
+
+def test_kernel_matches_python():
+    pytest.importorskip("numba")
+    assert core_fast._decide_kernel is not None
+    rnd = random.Random(0)
+    for _ in range(300):
+        n_blocks = rnd.randint(0, 5)
+        after_by_idx = tuple(rnd.randint(0, 5) for _ in range(n_blocks))
+        active = [rnd.randint(0, 5) for _ in range(n_blocks)]
+        masks = _random_masks(rnd, n_blocks)
+        inc_bit = 1 << n_blocks
+        active_py = list(active)
+        expected = core_fast._decide_py(masks, inc_bit, after_by_idx, active_py)
+        assert core_fast.decide(masks, inc_bit, after_by_idx, active) == expected
+        assert active == active_py
+
+
+def test_ranges_match_flags():
+    rnd = random.Random(1)
+    for _ in range(300):
+        n_blocks = rnd.randint(0, 5)
+        after_by_idx = tuple(rnd.randint(0, 5) for _ in range(n_blocks))
+        active = [rnd.randint(0, 5) for _ in range(n_blocks)]
+        masks = _random_masks(rnd, n_blocks)
+        inc_bit = 1 << n_blocks
+        active_py = list(active)
+        expected = core_fast._decide_py(masks, inc_bit, after_by_idx, active_py)
+        events = [(i, m) for i, m in enumerate(masks) if m]
+        ranges = core_fast.decide_ranges(events, len(masks), inc_bit, after_by_idx, active)
+        assert _emit_flags(ranges, len(masks)) == expected
+        assert active == active_py
@@ -0,0 +1,100 @@
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+import core
+import core_hs
+import log_extract
+from conftest import REGEXES, extract_bytes, random_log, random_patterns
+from log_extract import BlockRule, Rules
+
+
+def _extract(tmp_path, data: bytes, rules: Rules, separators: bool = False, **kw) -> bytes:
+    return extract_bytes(tmp_path, data, log_extract.extract_process, rules, separators, **kw)
+
+
+# Lines this Hyperscan build used to drop: a match ending at the end of the
+# scanned data, on an unterminated last line or on a line's "\n"
+@pytest.mark.parametrize(
+    "data, include, blocks, kept",
+    [
+        (
+            b"zz\n[x]aLogTemp:[x]fooc",
+            ["ERROR ", "[Ee]rror", "timeout", "code=[0-9]+[^a-z]", "failed[ \t]", "a+b", "^a", "oc"],
+            [],
+            b"[x]aLogTemp:[x]fooc",
+        ),
+        (
+            b"[x]aLogTemp:[x]fooc\n",
+            ["c\n", "[ab]c", "a+b", "qq1", "qq2", "qq3", "qq4"],
+            [BlockRule("^a", 0)],
+            b"[x]aLogTemp:[x]fooc\n",
+        ),
+    ],
+)
+def test_hyperscan_keeps_what_re_keeps(tmp_path, monkeypatch, data, include, blocks, kept):
+    pytest.importorskip("hyperscan")
+    rules = Rules(include, blocks, regex=True)
+    assert rules.compiled()[4] is not None
+    assert _extract(tmp_path, data, rules) == kept
+
+    monkeypatch.setattr(core_hs, "hyperscan", None)
+    assert _extract(tmp_path, data, Rules(include, blocks, regex=True)) == kept
+
+
+def test_hyperscan_leaves_unicode_classes_to_re(tmp_path):
+    # Python's \s matches \x1c-\x1f, Hyperscan's UCP \s doesn't
+    pytest.importorskip("hyperscan")
+    rules = Rules(["ERROR\\s", "qq1", "qq2", "qq3", "qq4", "qq5", "qq6", "qq7"], [], regex=True)
+    assert rules.compiled()[4] is None
+    assert _extract(tmp_path, b"ERROR\x1cx\nERRORx\n", rules) == b"ERROR\x1cx\n"
+
+
+def _random_rules(rnd: random.Random, regex: bool, **kw) -> Rules:
+    include, blocks = random_patterns(rnd, regex, **kw)
+    return Rules(include, [BlockRule(t, a) for t, a in blocks], regex)
+
+
+@pytest.mark.parametrize("regex", [False, True])
+def test_sharded_matches_sequential(tmp_path, monkeypatch, regex):
+    # Tiny shards, so shard heads are replayed with the countdown carried
+    # over from earlier shards and separators need the right line numbers
+    monkeypatch.setattr(core, "_PARALLEL_MIN_SIZE", 0)
+    monkeypatch.setattr(core, "_SHARD_SIZE", 200)
+    rnd = random.Random(regex)
+    for _ in range(4):
+        data = random_log(rnd, 300)
+        rules = _random_rules(rnd, regex)
+        for separators in (False, True):
+            expected = _extract(tmp_path, data, rules, separators, jobs=1)
+            got = _extract(tmp_path, data, rules, separators, jobs=3)
+            assert got == expected, (data, rules, separators)
+
+
+def test_hyperscan_matches_re(tmp_path, monkeypatch):
+    pytest.importorskip("hyperscan")
+    hs_pool = [p for p in REGEXES if not core_hs._unsafe(p)]
+    rnd = random.Random(0)
+    for _ in range(300):
+        data = random_log(rnd, rnd.randint(1, 8))
+        # Enough patterns Hyperscan takes for log_extract to use it at all
+        rules = _random_rules(rnd, True, n_min=log_extract._HS_MIN_PATTERNS, pool=hs_pool)
+        got = _extract(tmp_path, data, rules, True, jobs=1)
+        with monkeypatch.context() as m:
+            m.setattr(core_hs, "hyperscan", None)
+            expected = _extract(tmp_path, data, Rules(rules.include, rules.blocks, True), True, jobs=1)
+        assert got == expected, (data, rules)
+
+
+def test_cli_reports_missing_input(tmp_path):
+    script = os.path.join(os.path.dirname(log_extract.__file__), "log_extract.py")
+    missing = str(tmp_path / "missing.log")
+    proc = subprocess.run(
+        [sys.executable, script, "--cli", "-i", missing], capture_output=True, text=True
+    )
+    assert proc.returncode == 2
+    assert "No such file or directory" in proc.stderr
+    assert "Traceback" not in proc.stderr
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -38,6 +39,10 @@ except Exception:
     FileOpen = None
     FileSave = None
 
+# Progress reaches the UI at most this often (seconds). call_from_thread
+# waits for the UI, so every update also stalls the extraction thread.
+_UI_INTERVAL = 0.1
+
 
 def _clean_path(s: str) -> str:
     s = s.strip()
@@ -316,12 +321,17 @@ class LogExtractorTUI(App):
         separators: bool,
     ) -> None:
         last_lines = 0
+        last_ui = 0.0
 
         def on_progress(lines: int, done: bool) -> None:
-            nonlocal last_lines
+            nonlocal last_lines, last_ui
             last_lines = lines
             if done:
                 return
+            now = time.monotonic()
+            if now - last_ui < _UI_INTERVAL:
+                return
+            last_ui = now
 
             def ui() -> None:
                 self._set_status(f"Running… {lines:,} lines")
@@ -341,6 +351,7 @@ class LogExtractorTUI(App):
                 include_separators=separators,
                 progress_cb=on_progress,
                 cancel_event=self._cancel_event,
+                jobs=None,  # one process per CPU for big files
             )
             cancelled = self._cancel_event.is_set()
 